@@ -1,33 +1,54 @@
-import time
-
+import pandas as pd
 import streamlit as st
 
 from src.api_utils import get_statement, process_statement_data, send_request
+from src.cache import clear_snapshot, load_snapshot, save_snapshot
 from src.config import load_config
-from src.streamlit_dashboard import run_streamlit_dashboard
-from src.transformations import transform
-
-
-@st.cache_data
+from src.streamlit_dashboard import prepare_dashboard_data, run_streamlit_dashboard
+from src.transformations import (
+    add_option_flag,
+    add_period_columns,
+    convert_categorical_columns,
+    downcast_numeric_columns,
+    transform,
+)
+
+# Copy-on-write lets derived frames share the data of the statement until a column
+# is modified, instead of copying the whole frame up front
+pd.set_option("mode.copy_on_write", True)
+
+
+# Reruns within an hour reuse the loaded data, afterwards the snapshot is checked
+# again, which picks up the statement of a new day
+@st.cache_data(ttl=3600)
 def load_and_process_data():
-    config = load_config()
-    reference_code = send_request(config)
-    time.sleep(5)
-    df = get_statement(config, reference_code)
-    df = process_statement_data(df)
+    # The statement is fetched from IBKR only if there is no snapshot of today
+    df = load_snapshot()
+    if df is None:
+        config = load_config()
+        reference_code = send_request(config)
+        df = get_statement(config, reference_code)
+        df = process_statement_data(df)
+        save_snapshot(df)
     df = transform(df)
-    return df
+    df = add_period_columns(df)
+    df = add_option_flag(df)
+    df = convert_categorical_columns(df)
+    df = downcast_numeric_columns(df)
+    # The dashboard aggregates are built here, so they are cached with the data
+    return df, prepare_dashboard_data(df)
 
 
 def run_application():
     # Refresh button in the sidebar
     if st.button("🔄 Refresh data"):
+        clear_snapshot()
         st.cache_data.clear()
         st.rerun()
 
     # Load data
-    df = load_and_process_data()
-    run_streamlit_dashboard(df)
+    df, dashboard_data = load_and_process_data()
+    run_streamlit_dashboard(df, dashboard_data)
 
 
 if __name__ == "__main__":
@@ -2,8 +2,14 @@ import time
 import xml.etree.ElementTree as ET
 from io import StringIO
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+# Shared session, so the polling requests reuse the connection to the Flex Web Service
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
 
 
 def send_request(config):
@@ -23,7 +29,7 @@ def send_request(config):
 
     send_url = "https://ndcdyn.interactivebrokers.com/AccountManagement/FlexWebService/SendRequest"
     send_params = {"t": token, "q": query_id, "v": flex_version}
-    response = requests.get(send_url, params=send_params, headers=headers)
+    response = SESSION.get(send_url, params=send_params, headers=headers)
     reference_code = ET.fromstring(response.text).findtext("ReferenceCode")
 
     response.raise_for_status()  # Raise an error for bad responses
@@ -48,44 +54,78 @@ def get_statement(config, reference_code):
     get_url = "https://ndcdyn.interactivebrokers.com/AccountManagement/FlexWebService/GetStatement"
     get_params = {"t": token, "q": reference_code, "v": flex_version}
 
-    max_retries = 5
-    retry_delay = 5  # seconds
+    # The Flex Web Service allows about one request per second and token, so the first
+    # poll waits a second after SendRequest and the retries back off from 1 up to
+    # 5 seconds. The 8 attempts wait 24 seconds at most, about as long as the former
+    # initial wait and fixed delays of 25 seconds.
+    max_retries = 8
+    retry_messages = {
+        "1018": "Too many requests",
+        "1019": "Statement generation in progress",
+    }
+    time.sleep(1)
 
     for attempt in range(max_retries):
-        xml_data = requests.get(get_url, params=get_params, headers=headers).text
+        xml_data = SESSION.get(get_url, params=get_params, headers=headers).text
 
         # Check if response contains an error
         try:
             root = ET.fromstring(xml_data)
             error_code = root.findtext("ErrorCode")
 
-            if error_code == "1019":
-                # Error 1019: Statement generation in progress
+            if error_code in retry_messages:
+                # Error 1018: Too many requests, error 1019: Statement generation in progress
                 if attempt < max_retries - 1:
+                    retry_delay = max(1, min(5, 0.5 * 2**attempt))
                     print(
-                        f"Statement generation in progress. Retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})"
+                        f"{retry_messages[error_code]}. Retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})"
                     )
                     time.sleep(retry_delay)
                     continue
                 else:
                     error_msg = root.findtext(
                         "ErrorMessage",
-                        "Statement generation in progress. Maximum retries exceeded.",
+                        f"{retry_messages[error_code]}. Maximum retries exceeded.",
                     )
-                    raise Exception(f"FlexQuery Error 1019: {error_msg}")
+                    raise Exception(f"FlexQuery Error {error_code}: {error_msg}")
             elif error_code:
                 # Other error codes - fail immediately
                 error_msg = root.findtext("ErrorMessage", "Unknown error")
                 raise Exception(f"FlexQuery Error {error_code}: {error_msg}")
             else:
-                # No error code found, assume success
-                return pd.read_xml(StringIO(xml_data), xpath=".//Trade")
+                # No error code found, assume success. The parsed tree is reused
+                # instead of parsing the response again with pd.read_xml.
+                return parse_trades(root)
         except ET.ParseError:
             # If XML parsing fails, it might be a valid response with different structure
             # Return as-is and let the caller handle it
             return pd.read_xml(StringIO(xml_data), xpath=".//Trade")
 
 
+def parse_trades(root):
+    """
+    Build a DataFrame from the attributes of all Trade elements of a parsed statement.
+
+    Empty attributes become NaN and numeric columns are converted to numbers,
+    the same as with pd.read_xml.
+
+    Args:
+        root (xml.etree.ElementTree.Element): Root element of the statement XML.
+
+    Returns:
+        pd.DataFrame: DataFrame containing one row per trade.
+    """
+    df = pd.DataFrame.from_records([trade.attrib for trade in root.iter("Trade")])
+    df = df.replace("", np.nan)
+    for col in df.columns:
+        try:
+            df[col] = pd.to_numeric(df[col])
+        except (ValueError, TypeError):
+            pass
+
+    return df
+
+
 def process_statement_data(df):
     """
     Processes the statement data by converting date columns to datetime format.
@@ -96,9 +136,8 @@ def process_statement_data(df):
     Returns:
         pd.DataFrame: The processed DataFrame with date columns converted to datetime.
     """
-    df["tradeDate"] = pd.to_datetime(df["tradeDate"], format="%Y%m%d")
-    df["settleDateTarget"] = pd.to_datetime(df["settleDateTarget"], format="%Y%m%d")
-    df["expiry"] = pd.to_datetime(df["expiry"], format="%Y%m%d")
+    for col in ["tradeDate", "settleDateTarget", "expiry"]:
+        df[col] = pd.to_datetime(df[col], format="%Y%m%d")
     df["dateTime"] = pd.to_datetime(df["dateTime"], format="%Y%m%d%H%M%S")
 
     return df
@@ -0,0 +1,72 @@
+import os
+from datetime import date
+
+import pandas as pd
+
+from src.config import get_snapshot_dir
+
+
+def snapshot_path(day=None):
+    """
+    Path of the statement snapshot of a day, so a new day fetches a new statement.
+
+    Args:
+        day (date): Day of the snapshot, defaults to today.
+
+    Returns:
+        Path: Location of the parquet snapshot.
+    """
+    day = day or date.today()
+    return get_snapshot_dir() / f"statement-{day:%Y%m%d}.parquet"
+
+
+def load_snapshot(path=None):
+    """
+    Load the statement snapshot from disk.
+
+    Args:
+        path (Path): Location of the parquet snapshot, defaults to today's snapshot.
+
+    Returns:
+        pd.DataFrame | None: The snapshot, or None if no snapshot exists yet.
+    """
+    path = path or snapshot_path()
+    try:
+        return pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+
+
+def save_snapshot(df, path=None):
+    """
+    Save the statement data as parquet snapshot.
+
+    The snapshot is written zstd compressed to a temporary file first and then moved
+    into place, so a concurrent reader never sees a partially written file. Snapshots
+    of previous days are deleted afterwards.
+
+    Args:
+        df (pd.DataFrame): The processed statement data.
+        path (Path): Location of the parquet snapshot, defaults to today's snapshot.
+    """
+    path = path or snapshot_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    df.to_parquet(tmp_path, index=False, compression="zstd")
+    os.replace(tmp_path, path)
+
+    # Only the latest statement is needed, older snapshots are removed
+    for old_path in path.parent.glob("statement-*.parquet"):
+        if old_path != path:
+            old_path.unlink(missing_ok=True)
+
+
+def clear_snapshot(path=None):
+    """
+    Delete the statement snapshot, so the next load fetches a new statement.
+
+    Args:
+        path (Path): Location of the parquet snapshot, defaults to today's snapshot.
+    """
+    path = path or snapshot_path()
+    path.unlink(missing_ok=True)
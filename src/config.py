@@ -5,13 +5,29 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 
-def load_config() -> dict:
+def load_env() -> None:
     project_root = Path(__file__).resolve().parent.parent
     dotenv_path = project_root / ".env"
 
     # load_dotenv() loads environment variables from a .env file
     load_dotenv(dotenv_path=dotenv_path)
 
+
+def get_snapshot_dir() -> Path:
+    load_env()
+
+    # SNAPSHOT_DIR overrides the location, by default the snapshots are kept in the
+    # user cache directory, which is writable also when the app is installed
+    snapshot_dir = os.getenv("SNAPSHOT_DIR")
+    if snapshot_dir:
+        return Path(snapshot_dir).expanduser()
+    cache_home = os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "ibkr-trade-visualization"
+
+
+def load_config() -> dict:
+    load_env()
+
     config = {
         "TOKEN": os.getenv("TOKEN"),
         "QUERY_ID": os.getenv("QUERY_ID"),
@@ -1,147 +1,87 @@
-def identify_option_strategy(group):
+import numpy as np
+import pandas as pd
+
+# Strategies of a single contract by its 'putCall' and 'buySell' values
+SINGLE_LEG_STRATEGIES = {
+    ("C", "BUY"): "Long Call",
+    ("C", "SELL"): "Short Call",
+    ("P", "BUY"): "Long Put",
+    ("P", "SELL"): "Short Put",
+}
+
+
+def identify_option_strategy(put_call, buy_sell, n_expiries, strike):
     """Identifies option strategies based on a group of option contracts.
 
     Args:
-    group (pd.DataFrame): A DataFrame representing a group of option contracts with
-    the columns 'putCall', 'buySell', 'expiry', and 'strike'.
+    put_call (np.ndarray): The 'putCall' values of the option contracts in the group.
+    buy_sell (np.ndarray): The 'buySell' values of the option contracts in the group.
+    n_expiries (int): The number of distinct 'expiry' values in the group.
+    strike (np.ndarray): The 'strike' values of the option contracts in the group.
 
     Returns:
     str: The name of the identified option strategy or None if no
     strategy could be identified.
     """
-    if len(group) == 1:
-        # Long Call
-        if (group["putCall"] == "C").all():
-            if (group["buySell"] == "BUY").all():
-                return "Long Call"
-        # Short Call
-        if (group["putCall"] == "C").all():
-            if (group["buySell"] == "SELL").all():
-                return "Short Call"
-        # Long Put
-        if (group["putCall"] == "P").all():
-            if (group["buySell"] == "BUY").all():
-                return "Long Put"
-        # Short Put
-        if (group["putCall"] == "P").all():
-            if (group["buySell"] == "SELL").all():
-                return "Short Put"
-
-    elif len(group) == 2:
-        if group["expiry"].nunique() == 1:
-            # Bull Call Spread and Bear Call Spread
-            if (group["putCall"] == "C").all():
-                strike_sell = group.loc[group["buySell"] == "SELL", "strike"]
-                strike_buy = group.loc[group["buySell"] == "BUY", "strike"]
-                if not strike_sell.empty and not strike_buy.empty:
-                    strike_sell = strike_sell.iloc[0]
-                    strike_buy = strike_buy.iloc[0]
+    # Single contracts are looked up directly by their type and side
+    legs = len(put_call)
+    if legs == 1:
+        return SINGLE_LEG_STRATEGIES.get((put_call[0], buy_sell[0]), "Other")
+
+    # Primitive observations of the group, computed once for the decision tree.
+    # Counting the values replaces building sets, missing values count as neither.
+    calls = np.count_nonzero(put_call == "C")
+    puts = np.count_nonzero(put_call == "P")
+    buys = np.count_nonzero(buy_sell == "BUY")
+    sells = np.count_nonzero(buy_sell == "SELL")
+    all_calls = calls == legs
+    all_puts = puts == legs
+    calls_and_puts = calls > 0 and puts > 0 and calls + puts == legs
+    buys_and_sells = buys > 0 and sells > 0 and buys + sells == legs
+
+    if legs == 2:
+        # Vertical, calendar and diagonal spreads: one bought and one sold contract
+        # of the same type. Straddles and strangles: a bought put and a bought call.
+        if (all_calls or all_puts) and buys_and_sells:
+            strike_sell = strike[buy_sell == "SELL"][0]
+            strike_buy = strike[buy_sell == "BUY"][0]
+            if n_expiries == 1:
+                if all_calls:
                     if strike_sell < strike_buy:
                         return "Bear Call Spread"
-                    else:
-                        return "Bull Call Spread"
-            # Bull Put Spread and Bear Put Spread
-            if (group["putCall"] == "P").all():
-                strike_sell = group.loc[group["buySell"] == "SELL", "strike"]
-                strike_buy = group.loc[group["buySell"] == "BUY", "strike"]
-                if not strike_sell.empty and not strike_buy.empty:
-                    strike_sell = strike_sell.iloc[0]
-                    strike_buy = strike_buy.iloc[0]
-                    if strike_sell < strike_buy:
-                        return "Bear Put Spread"
-                    else:
-                        return "Bull Put Spread"
-        # Straddle
-        if set(group["putCall"]) == {"P", "C"}:
-            if (group["buySell"] == {"BUY"}).all():
-                strike_call = group.loc[group["putCall"] == "C", "strike"]
-                strike_put = group.loc[group["putCall"] == "P", "strike"]
-                if not strike_call.empty and not strike_put.empty:
-                    strike_call = strike_call.iloc[0]
-                    strike_put = strike_put.iloc[0]
-                    if strike_call == strike_put:
-                        return "Straddle"
-        # Strangle
-        if set(group["putCall"]) == {"P", "C"}:
-            if (group["buySell"] == {"BUY"}).all():
-                strike_call = group.loc[group["putCall"] == "C", "strike"]
-                strike_put = group.loc[group["putCall"] == "P", "strike"]
-                if not strike_call.empty and not strike_put.empty:
-                    strike_call = strike_call.iloc[0]
-                    strike_put = strike_put.iloc[0]
-                    if strike_call > strike_put:
-                        return "Strangle"
-
-        else:
-            # Calendar Call Spread
-            if (group["putCall"] == "C").all():
-                strike_sell = group.loc[group["buySell"] == "SELL", "strike"]
-                strike_buy = group.loc[group["buySell"] == "BUY", "strike"]
-                if not strike_sell.empty and not strike_buy.empty:
-                    strike_sell = strike_sell.iloc[0]
-                    strike_buy = strike_buy.iloc[0]
-                    if strike_sell == strike_buy:
-                        return "Calendar Call Spread"
-            # Calendar Put Spread
-            if (group["putCall"] == "P").all():
-                strike_sell = group.loc[group["buySell"] == "SELL", "strike"]
-                strike_buy = group.loc[group["buySell"] == "BUY", "strike"]
-                if not strike_sell.empty and not strike_buy.empty:
-                    strike_sell = strike_sell.iloc[0]
-                    strike_buy = strike_buy.iloc[0]
-                    if strike_sell == strike_buy:
-                        return "Calendar Put Spread"
-            # Diagonal Call Spread
-            if (group["putCall"] == "C").all():
-                strike_sell = group.loc[group["buySell"] == "SELL", "strike"]
-                strike_buy = group.loc[group["buySell"] == "BUY", "strike"]
-                if not strike_sell.empty and not strike_buy.empty:
-                    strike_sell = strike_sell.iloc[0]
-                    strike_buy = strike_buy.iloc[0]
-                    if strike_sell > strike_buy:
-                        return "Diagonal Call Spread"
-            # Diagonal Put Spread
-            if (group["putCall"] == "P").all():
-                strike_sell = group.loc[group["buySell"] == "SELL", "strike"]
-                strike_buy = group.loc[group["buySell"] == "BUY", "strike"]
-                if not strike_sell.empty and not strike_buy.empty:
-                    strike_sell = strike_sell.iloc[0]
-                    strike_buy = strike_buy.iloc[0]
-                    if strike_sell < strike_buy:
-                        return "Diagonal Put Spread"
-
-    elif len(group) == 4:
-        if group["expiry"].nunique() == 1:
-            # Iron Condor
-            if set(group["putCall"]) == {"P", "C"}:
-                if set(group["buySell"]) == {"BUY", "SELL"}:
-                    strikes = sorted(group["strike"].tolist())
-                    if strikes[0] < strikes[1] < strikes[2] < strikes[3]:
-                        return "Iron Condor"
-            # Iron Butterfly
-            if set(group["putCall"]) == {"P", "C"}:
-                if set(group["buySell"]) == {"BUY", "SELL"}:
-                    strikes = sorted(group["strike"].tolist())
-                    if strikes[1] == strikes[2]:
-                        return "Iron Butterfly"
-            # Long Put Butterfly
-            if (group["putCall"] == "P").all():
-                if set(group["buySell"]) == {"BUY", "SELL"}:
-                    strikes = sorted(group["strike"].tolist())
-                    if strikes[0] < strikes[1] == strikes[2] < strikes[3]:
-                        return "Long Put Butterfly"
-            # Long Call Butterfly
-            if (group["putCall"] == "C").all():
-                if set(group["buySell"]) == {"BUY", "SELL"}:
-                    strikes = sorted(group["strike"].tolist())
-                    if strikes[0] < strikes[1] == strikes[2] < strikes[3]:
-                        return "Long Call Butterfly"
-            # Box Spread
-            if set(group["putCall"]) == {"P", "C"}:
-                if set(group["buySell"]) == {"BUY", "SELL"}:
-                    strikes = sorted(group["strike"].tolist())
-                    if strikes[0] == strikes[1] and strikes[2] == strikes[3]:
-                        return "Box Spread"
+                    return "Bull Call Spread"
+                if strike_sell < strike_buy:
+                    return "Bear Put Spread"
+                return "Bull Put Spread"
+            if strike_sell == strike_buy:
+                return "Calendar Call Spread" if all_calls else "Calendar Put Spread"
+            if all_calls and strike_sell > strike_buy:
+                return "Diagonal Call Spread"
+            if all_puts and strike_sell < strike_buy:
+                return "Diagonal Put Spread"
+        elif calls_and_puts and buys == legs:
+            strike_call = strike[put_call == "C"][0]
+            strike_put = strike[put_call == "P"][0]
+            if strike_call == strike_put:
+                return "Straddle"
+            if strike_call > strike_put:
+                return "Strangle"
+
+    elif legs == 4:
+        if n_expiries == 1 and buys_and_sells:
+            strikes = sorted(strike.tolist())
+            if calls_and_puts:
+                if strikes[0] < strikes[1] < strikes[2] < strikes[3]:
+                    return "Iron Condor"
+                if strikes[1] == strikes[2]:
+                    return "Iron Butterfly"
+                if strikes[0] == strikes[1] and strikes[2] == strikes[3]:
+                    return "Box Spread"
+            elif strikes[0] < strikes[1] == strikes[2] < strikes[3]:
+                if all_puts:
+                    return "Long Put Butterfly"
+                if all_calls:
+                    return "Long Call Butterfly"
 
     return "Other"
 
@@ -156,32 +96,38 @@ def categorize_options_trades(df):
     df2 (pd.DataFrame): A DataFrame with the columns 'description' and 'dateTime'
 
     Returns:
-    pd.DataFrame: A DataFrame with an additional column 'strategy' containing the
-    identified option strategy for each group of warrants.
+    pd.DataFrame: The DataFrame with an additional column 'optionStrategy' containing
+    the identified option strategy for each group of warrants.
     """
 
-    df_copy = df.copy()
-
-    df_options = df_copy[
-        (df_copy["openCloseIndicator"] == "O")
-        & (df_copy["assetCategory"].isin(["OPT", "FOP"]))
-    ].copy()
-
-    grouped = df_options.groupby("dateTime")
-
-    strategy = grouped.apply(identify_option_strategy, include_groups=False)
-
-    df_options.loc[:, "optionStrategy"] = df_options["dateTime"].map(strategy)
-
-    df_options = df_options.rename(columns={"dateTime": "dateTime_options"})
-
-    df_merged = df.merge(
-        df_options[["description", "dateTime_options", "optionStrategy"]],
-        left_on=["description", "opendateTime"],
-        right_on=["description", "dateTime_options"],
-        how="left",
+    df_options = df[
+        (df["openCloseIndicator"] == "O") & (df["assetCategory"].isin(["OPT", "FOP"]))
+    ]
+
+    # Classify each group on plain arrays instead of a DataFrame per group
+    put_call = df_options["putCall"].to_numpy()
+    buy_sell = df_options["buySell"].to_numpy()
+    strike = df_options["strike"].to_numpy()
+    grouped = df_options.groupby("dateTime", observed=True)
+    n_expiries = grouped["expiry"].nunique().to_dict()
+    strategy = {
+        date_time: identify_option_strategy(
+            put_call[idx], buy_sell[idx], n_expiries[date_time], strike[idx]
+        )
+        for date_time, idx in grouped.indices.items()
+    }
+
+    # Look up the strategy of each trade by the opening trade of its contract. The
+    # first opening trade per contract and time is used, so trades are not repeated.
+    strategy_by_open = pd.Series(
+        df_options["dateTime"].map(strategy).to_numpy(),
+        index=pd.MultiIndex.from_arrays(
+            [df_options["description"], df_options["dateTime"]]
+        ),
     )
+    strategy_by_open = strategy_by_open[~strategy_by_open.index.duplicated()]
+    df["optionStrategy"] = strategy_by_open.reindex(
+        pd.MultiIndex.from_arrays([df["description"], df["opendateTime"]])
+    ).to_numpy()
 
-    df_merged.drop(columns=["dateTime_options"], inplace=True)
-
-    return df_merged
+    return df
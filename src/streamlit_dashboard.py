@@ -1,57 +1,311 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import streamlit as st
 
+# Precomputed period columns for each time filter, see add_period_columns
+PERIOD_COLUMNS = {
+    "All weeks": "week_str",
+    "All months": "month_str",
+    "All quarters": "quarter_str",
+}
+
+
+# Columns the trading metrics are summed from
+METRIC_COLUMNS = ["PnLRealized", "cost"]
+
+
+# Above this many days the cumulative profit line is downsampled to LINE_POINTS
+MAX_LINE_POINTS = 1500
+LINE_POINTS = 1000
+
+
+# Layout of the daily PnL chart and margins of the indicators, shared by all reruns
+PNL_CHART_LAYOUT = {
+    "title": {
+        "text": "📈 Daily PnL and Cumulative Total Profit",
+        "font": {"size": 20, "color": "white"},
+    },
+    "xaxis": {
+        "title": {"text": "Date"},
+        "type": "category",
+        "showgrid": True,
+        "gridcolor": "rgba(128,128,128,0.2)",
+        "color": "white",
+        "tickangle": -45,
+    },
+    "yaxis": {
+        "title": {"text": "Amount ($)"},
+        "showgrid": True,
+        "gridcolor": "rgba(128,128,128,0.2)",
+        "color": "white",
+        "zerolinecolor": "gray",
+        "zerolinewidth": 1,
+    },
+    "margin": {"l": 60, "r": 40, "t": 80, "b": 100},
+    "height": 500,
+    "plot_bgcolor": "#2E2E2E",
+    "paper_bgcolor": "#2E2E2E",
+    "font": {"color": "white"},
+}
+INDICATOR_MARGIN = {"l": 10, "r": 10, "t": 30, "b": 10}
+
 
 # Helper functions for time filters
 def get_weeks(df):
     if df.empty:
         return []
-    return sorted(df["tradeDate"].dt.strftime("%Y-W%U").unique())
+    return df["week_str"].cat.categories.tolist()
 
 
 def get_months(df):
     if df.empty:
         return []
-    return sorted(df["tradeDate"].dt.to_period("M").astype(str).unique())
+    return df["month_str"].cat.categories.tolist()
 
 
 def get_quarters(df):
     if df.empty:
         return []
-    return sorted(df["tradeDate"].dt.to_period("Q").astype(str).unique())
+    return df["quarter_str"].cat.categories.tolist()
 
 
-def create_indicator_figure(
-    value, title, value_format="", prefix="", bgcolor="#2E2E2E", text_color="white"
+# Columns the sidebar filters on, kept as keys of the daily PnL aggregate
+FILTER_COLUMNS = [
+    "assetCategory",
+    "underlyingSymbol",
+    "optionStrategy",
+    "week_str",
+    "month_str",
+    "quarter_str",
+]
+
+
+def isin_mask(series, values):
+    """Boolean mask of the rows in values, matched on the codes for categoricals"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.categories.get_indexer(values)
+        return np.isin(series.cat.codes.to_numpy(), codes[codes >= 0])
+    return series.isin(values).to_numpy()
+
+
+def observed_categories(series, mask):
+    """Sorted categories of a categorical that occur in the masked rows"""
+    codes = np.unique(series.cat.codes.to_numpy()[mask])
+    return series.cat.categories[codes[codes >= 0]].tolist()
+
+
+def options_by_asset(df):
+    """Symbol and strategy options of each asset category, built once per dataset"""
+    asset_codes = df["assetCategory"].cat.codes.to_numpy()
+    return {
+        column: {
+            asset: observed_categories(df[column], asset_codes == code)
+            for code, asset in enumerate(df["assetCategory"].cat.categories)
+        }
+        for column in ["underlyingSymbol", "optionStrategy"]
+    }
+
+
+def merge_options(options, selected_assets):
+    """Sorted union of the options of the selected asset categories"""
+    return sorted(set().union(*(options[asset] for asset in selected_assets)))
+
+
+def filter_mask(
+    df,
+    selected_assets,
+    selected_symbols,
+    selected_strategies,
+    period_column,
+    selected_periods,
 ):
-    """Creates a compact indicator figure without border"""
-    fig = go.Figure(
-        go.Indicator(
-            mode="number",
-            value=value,
-            number={
-                "valueformat": value_format,
-                "prefix": prefix,
-                "font": {"size": 28, "color": text_color},
-            },
-            title={"text": title, "font": {"size": 14, "color": text_color}},
+    """Combines the sidebar filters into a single boolean row mask"""
+    mask = np.ones(len(df), dtype=bool)
+    if selected_assets:
+        mask &= isin_mask(df["assetCategory"], selected_assets)
+    if selected_symbols:
+        mask &= isin_mask(df["underlyingSymbol"], selected_symbols)
+    if selected_strategies:
+        mask &= isin_mask(df["optionStrategy"], selected_strategies)
+    if period_column is not None:
+        mask &= isin_mask(df[period_column], selected_periods)
+    return mask
+
+
+def aggregate_daily_pnl(df):
+    """Sums the realized PnL per trade date and combination of filter values"""
+    daily_df = (
+        df.groupby(["tradeDate", *FILTER_COLUMNS], observed=True, dropna=False)[
+            "PnLRealized"
+        ]
+        .sum()
+        .reset_index()
+    )
+    # Integer day codes let the chart sum per day with np.bincount, stored as int32
+    # instead of the int64 codes factorize returns
+    day_codes, _ = pd.factorize(daily_df["tradeDate"], sort=True)
+    daily_df["dayCode"] = day_codes.astype(np.int32)
+    return daily_df
+
+
+def aggregate_trade_pnl(df):
+    """Sums the realized PnL and cost per trade and combination of filter values"""
+    trade_df = (
+        df.groupby(
+            ["opendateTime", "isOption", *FILTER_COLUMNS], observed=True, dropna=False
+        )[METRIC_COLUMNS]
+        .sum()
+        .reset_index()
+    )
+    # Integer trade codes let the metrics sum per trade with np.bincount
+    trade_codes, _ = pd.factorize(trade_df["opendateTime"], sort=True)
+    trade_df["tradeCode"] = trade_codes.astype(np.int32)
+    return trade_df
+
+
+def prepare_dashboard_data(df):
+    """
+    Builds the aggregates the dashboard reads on every rerun. Called once per loaded
+    dataset, so reruns neither aggregate nor hash the trades again.
+    """
+    daily_df = aggregate_daily_pnl(df)
+    return {
+        "daily_pnl": daily_df,
+        "trade_pnl": aggregate_trade_pnl(df),
+        "options_by_asset": options_by_asset(df),
+        # Identifies the dataset in the chart cache instead of hashing daily_df
+        "dataset_key": int(pd.util.hash_pandas_object(daily_df, index=False).sum()),
+    }
+
+
+def lttb_indices(y, n_out):
+    """
+    Selects n_out indices of evenly spaced values y with the
+    Largest-Triangle-Three-Buckets algorithm, keeping the first and last point.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Keep the point spanning the largest triangle with the previously
+        # selected point and the average of the next bucket
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
         )
+        selected = start + int(area.argmax())
+        indices[i + 1] = selected
+
+    return indices
+
+
+# The leading underscore excludes the daily aggregate from the cache key, the
+# dataset is identified by dataset_key instead
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_pnl_chart(_daily_df, dataset_key, filters):
+    """Builds the daily PnL and cumulative profit chart for the given filters"""
+    daily_df = _daily_df
+    # Re-aggregate the precomputed daily sums per day code instead of grouping all
+    # trades, in double precision so the cumulative sum does not drift
+    mask = filter_mask(daily_df, *filters)
+    day_codes = daily_df["dayCode"].to_numpy()
+    mask &= day_codes >= 0
+    n_days = day_codes.max() + 1 if day_codes.size else 0
+    day_rows = np.bincount(day_codes[mask], minlength=n_days)
+    day_pnl = np.bincount(
+        day_codes[mask],
+        weights=daily_df["PnLRealized"].to_numpy()[mask],
+        minlength=n_days,
     )
-
-    # More compact layout without border
-    fig.update_layout(
-        height=120,
-        margin=dict(l=10, r=10, t=30, b=10),
-        plot_bgcolor=bgcolor,
-        paper_bgcolor=bgcolor,
-        font=dict(color=text_color),
+    days = np.empty(n_days, dtype="datetime64[D]")
+    days[day_codes[day_codes >= 0]] = daily_df["tradeDate"].to_numpy()[day_codes >= 0]
+
+    traded = day_rows > 0
+    pnl_per_day = pd.DataFrame(
+        {
+            "tradeDateStr": np.datetime_as_string(days[traded], unit="D"),
+            "PnLRealized": day_pnl[traded],
+        }
     )
+    pnl_per_day["TotalProfit"] = np.cumsum(pnl_per_day["PnLRealized"].to_numpy())
+
+    bar_trace = {
+        "type": "bar",
+        "x": pnl_per_day["tradeDateStr"].to_numpy(),
+        "y": pnl_per_day["PnLRealized"].to_numpy(),
+        "name": "Daily PnL",
+        "marker": {
+            "color": np.where(
+                pnl_per_day["PnLRealized"].to_numpy() < 0, "#DD2C48", "#00A796"
+            )
+        },
+    }
+    # Downsample the line for long histories, the bars stay complete
+    line_df = pnl_per_day
+    if len(pnl_per_day) > MAX_LINE_POINTS:
+        line_df = pnl_per_day.iloc[
+            lttb_indices(pnl_per_day["TotalProfit"].to_numpy(), LINE_POINTS)
+        ]
 
-    return fig
+    line_trace = {
+        "type": "scattergl",
+        "x": line_df["tradeDateStr"].to_numpy(),
+        "y": line_df["TotalProfit"].to_numpy(),
+        "mode": "lines+markers",
+        "name": "Cumulative Total Profit",
+        "line": {"color": "#B27F1B", "width": 3},
+        "marker": {"size": 6},
+    }
+    # A plain dict spec skips building and validating graph objects, st.plotly_chart
+    # validates it once when rendering
+    return {"data": [bar_trace, line_trace], "layout": PNL_CHART_LAYOUT}
 
 
-def run_streamlit_dashboard(df):
+def create_indicator_figure(
+    value, title, value_format="", prefix="", bgcolor="#2E2E2E", text_color="white"
+):
+    """Creates a compact indicator figure spec without border"""
+    # A plain dict spec is validated once by st.plotly_chart, instead of building a
+    # Figure and validating it again in update_layout for each indicator
+    return {
+        "data": [
+            {
+                "type": "indicator",
+                "mode": "number",
+                "value": value,
+                "number": {
+                    "valueformat": value_format,
+                    "prefix": prefix,
+                    "font": {"size": 28, "color": text_color},
+                },
+                "title": {"text": title, "font": {"size": 14, "color": text_color}},
+            }
+        ],
+        # More compact layout without border
+        "layout": {
+            "height": 120,
+            "margin": INDICATOR_MARGIN,
+            "plot_bgcolor": bgcolor,
+            "paper_bgcolor": bgcolor,
+            "font": {"color": text_color},
+        },
+    }
+
+
+def run_streamlit_dashboard(df, dashboard_data):
     st.set_page_config(page_title="Hebelwerk Dashboard", layout="wide")
 
     # Custom CSS for better appearance
@@ -88,17 +342,17 @@ def run_streamlit_dashboard(df):
         index=0,
     )
 
-    asset_options = sorted(df["assetCategory"].unique())
+    asset_options = df["assetCategory"].cat.categories.tolist()
     selected_assets = st.sidebar.multiselect(
         "Asset Category:", asset_options, default=[]
     )
 
+    # Options of the selected assets are looked up instead of scanning the rows
+    asset_filter_options = dashboard_data["options_by_asset"]
     symbol_options = (
-        sorted(
-            df[df["assetCategory"].isin(selected_assets)]["underlyingSymbol"].unique()
-        )
+        merge_options(asset_filter_options["underlyingSymbol"], selected_assets)
         if selected_assets
-        else sorted(df["underlyingSymbol"].unique())
+        else df["underlyingSymbol"].cat.categories.tolist()
     )
     selected_symbols = st.sidebar.multiselect(
         "Underlying Symbol:", symbol_options, default=[]
@@ -108,10 +362,8 @@ def run_streamlit_dashboard(df):
     allowed = {"OPT", "FOP"}
     show_strategy = set(selected_assets).issubset(allowed) and selected_assets
     if show_strategy:
-        strategy_options = sorted(
-            df[df["assetCategory"].isin(selected_assets)]["optionStrategy"]
-            .dropna()
-            .unique()
+        strategy_options = merge_options(
+            asset_filter_options["optionStrategy"], selected_assets
         )
         selected_strategies = st.sidebar.multiselect(
             "Option Strategy:", strategy_options, default=[]
@@ -138,69 +390,57 @@ def run_streamlit_dashboard(df):
     else:
         selected_periods = []
 
-    # Data filtering
-    filtered_df = df.copy()
-    if selected_assets:
-        filtered_df = filtered_df[filtered_df["assetCategory"].isin(selected_assets)]
-    if selected_symbols:
-        filtered_df = filtered_df[
-            filtered_df["underlyingSymbol"].isin(selected_symbols)
-        ]
-    if show_strategy and selected_strategies:
-        filtered_df = filtered_df[
-            filtered_df["optionStrategy"].isin(selected_strategies)
-        ]
-
-    if time_filter == "Total":
-        pass
-    elif time_filter in ["All weeks", "All months", "All quarters"]:
-        if not selected_periods:
-            filtered_df = pd.DataFrame(columns=df.columns)
-        else:
-            if time_filter == "All weeks":
-                filtered_df["week_str"] = filtered_df["tradeDate"].dt.strftime("%Y-W%U")
-                filtered_df = filtered_df[
-                    filtered_df["week_str"].isin(selected_periods)
-                ]
-            elif time_filter == "All months":
-                filtered_df["month_str"] = (
-                    filtered_df["tradeDate"].dt.to_period("M").astype(str)
-                )
-                filtered_df = filtered_df[
-                    filtered_df["month_str"].isin(selected_periods)
-                ]
-            elif time_filter == "All quarters":
-                filtered_df["quarter_str"] = (
-                    filtered_df["tradeDate"].dt.to_period("Q").astype(str)
-                )
-                filtered_df = filtered_df[
-                    filtered_df["quarter_str"].isin(selected_periods)
-                ]
+    # Data filtering: combine all filters into one mask and select the rows once
+    period_column = PERIOD_COLUMNS.get(time_filter)
+    filters = (
+        sorted(selected_assets),
+        sorted(selected_symbols),
+        sorted(selected_strategies),
+        period_column,
+        sorted(selected_periods),
+    )
+    # The metrics are calculated from the much smaller per-trade aggregate, an active
+    # period filter without selected periods matches no rows
+    trade_df = dashboard_data["trade_pnl"]
+    filtered_df = trade_df[filter_mask(trade_df, *filters)]
 
     # Calculations
     if not filtered_df.empty:
-        trade_pnl_sum = filtered_df.groupby("opendateTime")["PnLRealized"].sum()
-        wins = (trade_pnl_sum > 0).sum()
-        total_trades = len(trade_pnl_sum)
+        # All trade metrics derive from one array of PnL sums per trade
+        trade_codes = filtered_df["tradeCode"].to_numpy()
+        has_trade = trade_codes >= 0
+        trade_codes = trade_codes[has_trade]
+        trade_rows = np.bincount(trade_codes)
+        trade_pnl = np.bincount(
+            trade_codes,
+            weights=filtered_df["PnLRealized"].to_numpy()[has_trade],
+            minlength=trade_rows.size,
+        )[trade_rows > 0]
+        winners = trade_pnl[trade_pnl > 0]
+        losers = trade_pnl[trade_pnl < 0]
+        wins = winners.size
+        total_trades = trade_pnl.size
         win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
 
-        losers = trade_pnl_sum[trade_pnl_sum < 0]
-        winners = trade_pnl_sum[trade_pnl_sum > 0]
-        avg_loser = losers.mean() if not losers.empty else 0
-        avg_winner = winners.mean() if not winners.empty else 0
-        max_winner = winners.max() if not winners.empty else 0
-        max_loser = losers.min() if not losers.empty else 0
-        avg_per_trade = trade_pnl_sum.mean() if not trade_pnl_sum.empty else 0
+        avg_loser = losers.mean() if losers.size else 0
+        avg_winner = winners.mean() if winners.size else 0
+        max_winner = winners.max() if winners.size else 0
+        max_loser = losers.min() if losers.size else 0
+        avg_per_trade = trade_pnl.mean() if trade_pnl.size else 0
     else:
         win_rate = wins = total_trades = 0
         avg_loser = avg_winner = max_winner = max_loser = avg_per_trade = 0
 
-    # PCR calculation
-    pcr_df = filtered_df[filtered_df["assetCategory"].isin(["FOP", "OPT"])]
-    if not pcr_df.empty:
-        sum_cost = abs(pcr_df["cost"].sum()).round(2)
-        sum_realized = pcr_df["PnLRealized"].sum().round(2)
-        pcr = (sum_realized / sum_cost * 100).round(2) if sum_cost != 0 else 0
+    # PCR calculation on the option rows
+    options = filtered_df["isOption"].to_numpy()
+    if options.any():
+        cost = filtered_df["cost"].to_numpy()
+        pnl = filtered_df["PnLRealized"].to_numpy()
+        total_cost = float(np.nansum(cost, where=options))
+        total_realized = float(np.nansum(pnl, where=options))
+        sum_cost = round(abs(total_cost), 2)
+        sum_realized = round(total_realized, 2)
+        pcr = round(sum_realized / sum_cost * 100, 2) if sum_cost != 0 else 0
     else:
         pcr = sum_cost = sum_realized = 0
 
@@ -209,64 +449,9 @@ def run_streamlit_dashboard(df):
         st.warning("⚠️ No data available for the selected filters.")
         combined_chart = go.Figure()
     else:
-        pnl_per_day = (
-            filtered_df.groupby(filtered_df["tradeDate"].dt.date)["PnLRealized"]
-            .sum()
-            .reset_index()
-        )
-        pnl_per_day["tradeDate"] = pd.to_datetime(pnl_per_day["tradeDate"])
-        pnl_per_day = pnl_per_day.sort_values("tradeDate")
-        pnl_per_day["TotalProfit"] = pnl_per_day["PnLRealized"].cumsum()
-        pnl_per_day["tradeDateStr"] = pnl_per_day["tradeDate"].dt.strftime("%Y-%m-%d")
-
-        combined_chart = go.Figure()
-        combined_chart.add_trace(
-            go.Bar(
-                x=pnl_per_day["tradeDateStr"],
-                y=pnl_per_day["PnLRealized"],
-                name="Daily PnL",
-                marker_color=[
-                    "#DD2C48" if x < 0 else "#00A796"
-                    for x in pnl_per_day["PnLRealized"]
-                ],
-            )
-        )
-        combined_chart.add_trace(
-            go.Scatter(
-                x=pnl_per_day["tradeDateStr"],
-                y=pnl_per_day["TotalProfit"],
-                mode="lines+markers",
-                name="Cumulative Total Profit",
-                line=dict(color="#B27F1B", width=3),
-                marker=dict(size=6),
-            )
-        )
-        combined_chart.update_layout(
-            title={
-                "text": "📈 Daily PnL and Cumulative Total Profit",
-                "font": {"size": 20, "color": "white"},
-            },
-            xaxis=dict(
-                title="Date",
-                type="category",
-                showgrid=True,
-                gridcolor="rgba(128,128,128,0.2)",
-                color="white",
-                tickangle=-45,
-            ),
-            yaxis=dict(
-                title="Amount ($)",
-                showgrid=True,
-                gridcolor="rgba(128,128,128,0.2)",
-                color="white",
-                zerolinecolor="gray",
-                zerolinewidth=1,
-            ),
-            margin=dict(l=60, r=40, t=80, b=100),
-            height=500,
-            plot_bgcolor="#2E2E2E",
-            paper_bgcolor="#2E2E2E",
-            font=dict(color="white"),
+        # Identical filter combinations reuse the cached figure
+        combined_chart = build_pnl_chart(
+            dashboard_data["daily_pnl"], dashboard_data["dataset_key"], filters
         )
 
     # Layout
@@ -5,6 +5,20 @@ import pandas as pd
 
 from src.options import categorize_options_trades
 
+# Low-cardinality string columns used for filtering in the dashboard
+CATEGORICAL_COLUMNS = ["assetCategory", "underlyingSymbol", "optionStrategy"]
+
+# String columns transform compares and groups on, converted before consolidating
+TRANSFORM_CATEGORICAL_COLUMNS = [
+    "putCall",
+    "buySell",
+    "assetCategory",
+    "openCloseIndicator",
+    "description",
+    "underlyingSymbol",
+    "notes",
+]
+
 
 def consolidate_trades(df):
     """
@@ -19,29 +33,34 @@ def consolidate_trades(df):
         pandas.DataFrame: A new DataFrame with consolidated trades.
     """
 
-    partial_trades_df = df[df["notes"] == "P"].copy()
-    other_trades_df = df[df["notes"] != "P"].copy()
+    partial_trades_df = df[df["notes"] == "P"]
+    other_trades_df = df[df["notes"] != "P"]
 
+    # Partial executions of one order share the contract, side and execution time, so
+    # they are grouped on these keys only and the other columns are taken from the
+    # first partial execution
     group_cols = [
-        col
-        for col in partial_trades_df.columns
-        if col not in ["ibCommission", "cost", "fifoPnlRealized", "mtmPnl", "notes"]
+        "description",
+        "buySell",
+        "openCloseIndicator",
+        "dateTime",
+        "tradeDate",
     ]
+    sum_cols = ["ibCommission", "cost", "fifoPnlRealized", "mtmPnl"]
+    agg_funcs = {
+        col: "first"
+        for col in partial_trades_df.columns
+        if col not in [*group_cols, *sum_cols, "notes"]
+    }
+    agg_funcs.update({col: "sum" for col in sum_cols})
 
     if not partial_trades_df.empty:
         consolidated_partials_df = partial_trades_df.groupby(
-            group_cols, as_index=False, dropna=False
-        ).agg(
-            {
-                "ibCommission": "sum",
-                "cost": "sum",
-                "fifoPnlRealized": "sum",
-                "mtmPnl": "sum",
-            }
-        )
+            group_cols, as_index=False, sort=False, dropna=False, observed=True
+        ).agg(agg_funcs)
         consolidated_partials_df["notes"] = "P"
     else:
-        consolidated_partials_df = pd.DataFrame(columns=df.columns)
+        consolidated_partials_df = df.iloc[:0]
 
     consolidated_partials_df = consolidated_partials_df.reindex(columns=df.columns)
 
@@ -56,29 +75,6 @@ def consolidate_trades(df):
     return final_trades_df
 
 
-def filter_group_general(group):
-    """
-    Filters a group of trades to keep only the relevant entries.
-    This function checks if there are any closed trades in the group.
-    If there are, it keeps the closed trades and all open trades that occur after the last closed trade.
-
-    Parameters:
-        group (pandas.DataFrame): A group of trades.
-
-    Returns:
-        pandas.DataFrame: The filtered group.
-    """
-    closed_trades = group[group["openCloseIndicator"] == "C"]
-    if not closed_trades.empty:
-        last_close_time = closed_trades["dateTime"].max()
-        later_open_trades = group[
-            (group["openCloseIndicator"] == "O") & (group["dateTime"] > last_close_time)
-        ]
-        return pd.concat([closed_trades, later_open_trades])
-    else:
-        return group
-
-
 def transform(df):
     """
     Filters and groups the given DataFrame based on specified criteria.
@@ -89,26 +85,29 @@ def transform(df):
     Returns:
         pandas.DataFrame: A grouped DataFrame with calculated PnLRealized.
     """
-    df_copy = df.copy()
-    if "tradeID" in df_copy.columns:
-        df_copy = df_copy.drop(columns=["tradeID"], errors="ignore")
+    # drop returns a new DataFrame, so the caller's statement data is not modified
+    df_copy = df.drop(columns=["tradeID"], errors="ignore")
+
+    # Comparisons and groupings below work on the integer codes of these columns
+    for col in TRANSFORM_CATEGORICAL_COLUMNS:
+        df_copy[col] = df_copy[col].astype("category")
 
     df_copy = consolidate_trades(df_copy)
 
-    # Initialize the new column with empty values
-    df_copy["opendateTime"] = pd.NaT
-    df_copy["opendateTime"] = df_copy["opendateTime"].astype("datetime64[ns]")
-
-    # Group by 'description'
-    grouped = df_copy.groupby("description")
-    for name, group in grouped:
-        if "O" in group["openCloseIndicator"].values:
-            open_datetime = group[group["openCloseIndicator"] == "O"]["dateTime"].iloc[
-                0
-            ]
-        else:
-            open_datetime = group["dateTime"].iloc[0]
-        df_copy.loc[df_copy["description"] == name, "opendateTime"] = open_datetime
+    # Opening and closing trades are identified once and reused in the steps below
+    is_open = df_copy["openCloseIndicator"] == "O"
+    is_close = df_copy["openCloseIndicator"] == "C"
+
+    # The open time of a position is the time of its first opening trade, or of its
+    # first trade if the opening trade is not part of the statement
+    open_datetime = df_copy["dateTime"].where(is_open)
+    first_open = open_datetime.groupby(
+        df_copy["description"], sort=False, observed=True
+    ).transform("first")
+    first_trade = df_copy.groupby("description", sort=False, observed=True)[
+        "dateTime"
+    ].transform("first")
+    df_copy["opendateTime"] = first_open.fillna(first_trade)
 
     df_copy_opt = categorize_options_trades(df_copy)
 
@@ -127,35 +126,157 @@ def transform(df):
     # That way the PnLRealized is calculated as fast as possible (t+1).
     # Because of weekends and holidays the settlement date is not always t+1 and can be t+2 or t+3.
 
+    # The settlement window is evaluated once and reused for the filter below
+    settle_dates = df_copy_opt["settleDateTarget"].to_numpy()
+    in_settle_window = (settle_dates >= current_date.to_datetime64()) & (
+        settle_dates <= future_date.to_datetime64()
+    )
+
+    fifo_pnl = df_copy_opt["fifoPnlRealized"].to_numpy(dtype=np.float64)
     condition = (
-        (df_copy_opt["tradeDate"] == df_copy_opt["expiry"])
-        & (df_copy_opt["fifoPnlRealized"] == 0)
-        & (df_copy_opt["settleDateTarget"].between(current_date, future_date))
+        (df_copy_opt["tradeDate"].to_numpy() == df_copy_opt["expiry"].to_numpy())
+        & (fifo_pnl == 0)
+        & in_settle_window
     )
 
     # mtmPnL does not include the commission, so we add it to the mtmPnl to get the correct PnLRealized.
-    mtmPnl_commission = df_copy_opt["mtmPnl"] + df_copy_opt["ibCommission"]
-
-    # Set PnLRealized to mtmPnl + ibCommission if the condition is met, otherwise use fifoPnlRealized
-    df_copy_opt["PnLRealized"] = np.where(
-        condition, mtmPnl_commission, df_copy_opt["fifoPnlRealized"]
+    # Set PnLRealized to mtmPnl + ibCommission if the condition is met, otherwise use fifoPnlRealized.
+    # The sum is written into a copy of fifoPnlRealized only where the condition holds.
+    pnl_realized = fifo_pnl.copy()
+    np.add(
+        df_copy_opt["mtmPnl"].to_numpy(),
+        df_copy_opt["ibCommission"].to_numpy(),
+        out=pnl_realized,
+        where=condition,
     )
+    df_copy_opt["PnLRealized"] = pnl_realized
 
     # Filter for closed trades except for the ones that are not settled yet, like 0DTE options
-    df_copy_opt = df_copy_opt[
-        (df_copy_opt["openCloseIndicator"] == "C")
-        | (
-            (df_copy_opt["settleDateTarget"].between(current_date, future_date))
-            & (df_copy_opt["PnLRealized"] != 0)
-        )
-    ]
+    row_mask = is_close | (in_settle_window & (df_copy_opt["PnLRealized"] != 0))
+    df_copy_opt = df_copy_opt[row_mask]
+    is_open = is_open[row_mask]
+    is_close = is_close[row_mask]
 
     # Remove duplicates based on 'description' and 'tradeDate'.
     # Some 0DTE trades can be counted twice, if the position is closed on the same day and the position is not settled yet.
-    grouped = df_copy_opt.groupby(["description", "tradeDate"])
+    # Per description and trade date, closed trades are kept together with the open
+    # trades after the last close. Groups without a closed trade are kept entirely.
+    keys = [df_copy_opt["description"], df_copy_opt["tradeDate"]]
+    has_close = is_close.groupby(
+        keys, sort=False, dropna=False, observed=True
+    ).transform("any")
+    last_close_time = (
+        df_copy_opt["dateTime"]
+        .where(is_close)
+        .groupby(keys, sort=False, dropna=False, observed=True)
+        .transform("max")
+    )
+    later_open = is_open & (df_copy_opt["dateTime"] > last_close_time)
+    keep = (is_close | later_open | ~has_close) & (
+        df_copy_opt["description"].notna() & df_copy_opt["tradeDate"].notna()
+    )
 
-    df_no_dupes = grouped.apply(
-        filter_group_general, include_groups=False
-    ).reset_index()
+    df_no_dupes = df_copy_opt[keep].reset_index(drop=True)
+
+    # Symbols and contracts of open positions only have no rows left, their categories
+    # are dropped so they are not offered as filter values. 'notes' is no longer
+    # categorical after the consolidated partial trades are concatenated.
+    for col in TRANSFORM_CATEGORICAL_COLUMNS:
+        if isinstance(df_no_dupes[col].dtype, pd.CategoricalDtype):
+            df_no_dupes[col] = df_no_dupes[col].cat.remove_unused_categories()
 
     return df_no_dupes
+
+
+def add_period_columns(df):
+    """
+    Adds the week, month and quarter of the trade date as categorical string columns.
+    The dashboard filters on these periods on every rerun, so they are computed once
+    after loading instead of formatting the trade dates again for each interaction.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the transformed trade data.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with the columns 'week_str', 'month_str' and 'quarter_str'.
+    """
+    dates = df["tradeDate"]
+    year = dates.dt.year.to_numpy()
+
+    # Periods are encoded as sortable integers and only the distinct values are
+    # formatted as labels. Weeks start on Sunday, same numbering as strftime("%U").
+    week = (dates.dt.dayofyear - 1 + 7 - (dates.dt.dayofweek + 1) % 7) // 7
+    weeks, week_codes = np.unique(year * 100 + week.to_numpy(), return_inverse=True)
+    df["week_str"] = pd.Categorical.from_codes(
+        week_codes, [f"{w // 100}-W{w % 100:02d}" for w in weeks]
+    )
+
+    months, month_codes = np.unique(
+        dates.to_numpy().astype("datetime64[M]"), return_inverse=True
+    )
+    df["month_str"] = pd.Categorical.from_codes(
+        month_codes, np.datetime_as_string(months, unit="M").tolist()
+    )
+
+    quarters, quarter_codes = np.unique(
+        year * 10 + dates.dt.quarter.to_numpy(), return_inverse=True
+    )
+    df["quarter_str"] = pd.Categorical.from_codes(
+        quarter_codes, [f"{q // 10}Q{q % 10}" for q in quarters]
+    )
+
+    return df
+
+
+def convert_categorical_columns(df):
+    """
+    Converts the low-cardinality string columns in CATEGORICAL_COLUMNS to the pandas
+    category dtype, so filters compare integer codes instead of strings and the
+    distinct values are available from the categories without scanning the column.
+    Columns that are categorical already keep only the categories that still have rows.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the transformed trade data.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with categorical filter columns.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].astype("category").cat.remove_unused_categories()
+
+    return df
+
+
+def add_option_flag(df):
+    """
+    Adds the boolean column 'isOption' marking option and futures option trades,
+    which the premium metrics are calculated from.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the transformed trade data.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with the column 'isOption'.
+    """
+    df["isOption"] = df["assetCategory"].isin(["OPT", "FOP"])
+
+    return df
+
+
+def downcast_numeric_columns(df):
+    """
+    Downcasts the int64 columns to the smallest integer type holding their values,
+    which reduces the memory the dashboard filters on every interaction. The float
+    columns hold prices, amounts and exchange rates and stay float64, in float32 they
+    would lose their cents.
+
+    Parameters:
+        df (pandas.DataFrame): The DataFrame containing the transformed trade data.
+
+    Returns:
+        pandas.DataFrame: The DataFrame with downcast integer columns.
+    """
+    for col in df.select_dtypes("int64").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+
+    return df